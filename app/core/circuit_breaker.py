@@ -0,0 +1,73 @@
+"""
+Предохранитель (circuit breaker) для вызовов микросервисов
+"""
+
+import time
+from typing import Optional
+
+from app.core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для вызовов микросервиса
+
+    После failure_threshold ошибок подряд цепь размыкается, и вызовы
+    отклоняются сразу, не дожидаясь таймаута. Через reset_timeout секунд
+    цепь переходит в полуоткрытое состояние: вызывающая сторона выполняет одну
+    дешевую пробу (например, /health), успех замыкает цепь, ошибка снова
+    размыкает ее на reset_timeout.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failure_count = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        """Состояние цепи: closed, open или half_open"""
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def acquire_probe(self) -> bool:
+        """
+        Захват права на пробный вызов в полуоткрытом состоянии
+
+        Returns:
+            True, если пришло время пробы и ее еще никто не начал
+        """
+        if self.state != "half_open":
+            return False
+
+        # Пока проба выполняется, остальные вызовы видят цепь разомкнутой
+        self.opened_at = time.monotonic()
+        logger.info("🔌 %s: пробный вызов после паузы", self.name)
+        return True
+
+    def record_success(self):
+        """Учет успешного вызова"""
+        if self.opened_at is not None:
+            logger.info("✅ %s: цепь снова замкнута", self.name)
+
+        self.failure_count = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        """Учет неудачного вызова"""
+        self.failure_count += 1
+
+        if self.failure_count >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(
+                    "⚠️ %s: %d ошибок подряд, вызовы приостановлены на %.0f сек",
+                    self.name, self.failure_count, self.reset_timeout
+                )
+            self.opened_at = time.monotonic()
@@ -2,22 +2,39 @@
 Конфигурация приложения
 """
 
+import logging
 import os
 from pathlib import Path
 from typing import Optional
 
+# Логгер для ошибок на этапе загрузки (до настройки основной системы логирования)
+_bootstrap_logger = logging.getLogger("bootstrap")
+
+# Короткая ссылка на окружение (не копия): значения читаются один раз,
+# при создании класса Settings во время импорта
+_env = os.environ
+_docker = _env.get("DOCKER_ENV", "false").lower() == "true"
+
+# Ядра CPU, доступные процессу (с учетом ограничений affinity в контейнере)
+_cpu_count = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+
 class Settings:
     """Настройки приложения"""
     
     # Основные настройки
     APP_NAME: str = "Медиа Обработчик"
     APP_VERSION: str = "1.0.0"
-    DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
+    DEBUG: bool = _env.get("DEBUG", "false").lower() == "true"
     
     # Настройки сервера
-    HOST: str = os.getenv("HOST", "127.0.0.1")
-    PORT: int = int(os.getenv("PORT", "8000"))
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    HOST: str = _env.get("HOST", "127.0.0.1")
+    PORT: int = int(_env.get("PORT", "8000"))
+    LOG_LEVEL: str = _env.get("LOG_LEVEL", "INFO")
+    
+    # Реализация event loop и HTTP парсера для uvicorn ("auto" выбирает
+    # uvloop и httptools, если они установлены)
+    UVICORN_LOOP: str = _env.get("UVICORN_LOOP", "auto")
+    UVICORN_HTTP: str = _env.get("UVICORN_HTTP", "auto")
     
     # Пути к директориям
     BASE_DIR: Path = Path(__file__).parent.parent.parent
@@ -25,16 +42,46 @@ class Settings:
     OUTPUT_DIR: Path = BASE_DIR / "outputs"
     LOGS_DIR: Path = BASE_DIR / "logs"
     
+    # Строковая форма пути к логам для os.path.join в файловых обработчиках
+    LOGS_DIR_STR: str = str(LOGS_DIR)
+    
+    # Пул соединений к микросервисам
+    MICROSERVICES_MAX_CONNECTIONS: int = int(_env.get("MICROSERVICES_MAX_CONNECTIONS", "16"))
+    
+    # Предохранитель вызовов микросервисов: ошибок подряд до размыкания и пауза (сек)
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = int(_env.get("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_BREAKER_RESET_TIMEOUT: float = float(_env.get("CIRCUIT_BREAKER_RESET_TIMEOUT", "30"))
+    
+    # Максимум одновременных транскрипций в одном процессе (модель делит GPU/CPU)
+    TRANSCRIPTION_MAX_PARALLEL: int = int(_env.get("TRANSCRIPTION_MAX_PARALLEL", "1"))
+    
+    # Кэш результатов транскрипции повторно загруженных файлов: записей и время жизни (сек)
+    TRANSCRIPTION_CACHE_SIZE: int = int(_env.get("TRANSCRIPTION_CACHE_SIZE", "32"))
+    TRANSCRIPTION_CACHE_TTL: float = float(_env.get("TRANSCRIPTION_CACHE_TTL", "3600"))
+    
+    # Число воркеров uvicorn для микросервиса конвертации (по умолчанию — по числу ядер)
+    WEB_CONCURRENCY: int = int(_env.get("WEB_CONCURRENCY", str(_cpu_count)))
+    
+    # Максимум одновременных процессов FFmpeg в одном воркере конвертера.
+    # Лимит действует на каждый воркер: всего процессов до WEB_CONCURRENCY * CONVERTER_MAX_PARALLEL
+    CONVERTER_MAX_PARALLEL: int = int(_env.get("CONVERTER_MAX_PARALLEL", "1"))
+    
+    # Модель Whisper и тип вычислений (int8 — квантованные веса, быстрее всего на CPU)
+    WHISPER_MODEL: str = _env.get("WHISPER_MODEL", "base")
+    WHISPER_COMPUTE_TYPE: str = _env.get("WHISPER_COMPUTE_TYPE", "int8")
+    
+    # Потоки CPU для инференса Whisper (по умолчанию — все доступные ядра)
+    WHISPER_THREADS: int = int(_env.get("WHISPER_THREADS", str(_cpu_count)))
+    
     # Настройки Docker
-    DOCKER_ENV: bool = os.getenv("DOCKER_ENV", "false").lower() == "true"
+    DOCKER_ENV: bool = _docker
     
     # Поддерживаемые форматы
-    SUPPORTED_VIDEO_FORMATS = {'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm'}
-    SUPPORTED_AUDIO_FORMATS = {'.mp3', '.wav', '.flac', '.m4a', '.aac', '.ogg', '.wma'}
+    SUPPORTED_VIDEO_FORMATS = frozenset({'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm'})
+    SUPPORTED_AUDIO_FORMATS = frozenset({'.mp3', '.wav', '.flac', '.m4a', '.aac', '.ogg', '.wma'})
     
-    @property
-    def ALL_SUPPORTED_FORMATS(self):
-        return self.SUPPORTED_VIDEO_FORMATS | self.SUPPORTED_AUDIO_FORMATS
+    # Объединение вычисляется один раз при импорте
+    ALL_SUPPORTED_FORMATS = SUPPORTED_VIDEO_FORMATS | SUPPORTED_AUDIO_FORMATS
     
     @property
     def VIDEO_FORMATS(self):
@@ -48,7 +95,7 @@ class Settings:
             try:
                 directory.mkdir(exist_ok=True)
             except Exception as e:
-                print(f"⚠️ Не удалось создать директорию {directory}: {e}")
+                _bootstrap_logger.warning("⚠️ Не удалось создать директорию %s: %s", directory, e)
 
 # Глобальный экземпляр настроек
 settings = Settings()
@@ -3,16 +3,49 @@
 """
 
 import logging
+import logging.handlers
+import os
 import sys
+import time
+from collections import deque, namedtuple
+from functools import lru_cache
+from itertools import islice
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-from pythonjsonlogger import jsonlogger
+import orjson
 
 from app.core.config import settings
 
 
+# Кэш форматированного времени: strftime выполняется раз в секунду, а не на каждую запись.
+# Секунда и строка хранятся одним кортежем, чтобы записи из разных потоков
+# (asyncio.to_thread) не могли увидеть секунду от одной записи и строку от другой
+_clock_cache = (None, "")
+
+
+def _format_clock(created: float) -> str:
+    """
+    Форматирование времени записи лога в HH:MM:SS
+    
+    Args:
+        created: Время создания записи (record.created)
+        
+    Returns:
+        Строка времени
+    """
+    global _clock_cache
+    
+    second = int(created)
+    cached_second, value = _clock_cache
+    if second != cached_second:
+        value = time.strftime('%H:%M:%S', time.localtime(second))
+        _clock_cache = (second, value)
+    
+    return value
+
+
 class ColoredFormatter(logging.Formatter):
     """Форматтер с цветным выводом для консоли"""
     
@@ -35,46 +68,82 @@ class ColoredFormatter(logging.Formatter):
         'CRITICAL': '🚨'
     }
     
+    # Готовые префиксы уровней (заполняется после определения класса)
+    _LEVEL_PREFIX = {}
+    
+    # Кэш выровненных имен модулей по имени логгера
+    _PADDED_NAMES = {}
+    
+    @classmethod
+    def _level_prefix(cls, levelname: str) -> str:
+        """Цветной префикс с эмодзи для уровня логирования"""
+        color = cls.COLORS.get(levelname, cls.COLORS['RESET'])
+        emoji = cls.EMOJIS.get(levelname, '')
+        return f"{color}{emoji} {levelname:<8}{cls.COLORS['RESET']}"
+    
     def format(self, record):
         # Добавляем цвет и эмодзи к уровню логирования
         levelname = record.levelname
-        color = self.COLORS.get(levelname, self.COLORS['RESET'])
-        emoji = self.EMOJIS.get(levelname, '')
+        colored_level = self._LEVEL_PREFIX.get(levelname) or self._level_prefix(levelname)
         
         # Форматируем время
-        timestamp = datetime.fromtimestamp(record.created).strftime('%H:%M:%S.%f')[:-3]
+        timestamp = f"{_format_clock(record.created)}.{int(record.msecs):03d}"
         
         # Собираем сообщение
-        colored_level = f"{color}{emoji} {levelname:<8}{self.COLORS['RESET']}"
-        module_name = f"{record.name:<20}"
+        module_name = self._PADDED_NAMES.get(record.name)
+        if module_name is None:
+            module_name = self._PADDED_NAMES[record.name] = f"{record.name:<20}"
         
         return f"[{timestamp}] {colored_level} {module_name} | {record.getMessage()}"
 
 
+ColoredFormatter._LEVEL_PREFIX = {
+    level: ColoredFormatter._level_prefix(level)
+    for level in ColoredFormatter.EMOJIS
+}
+
+
+class FastJsonFormatter(logging.Formatter):
+    """JSON форматтер для файловых логов на базе orjson"""
+    
+    def format(self, record):
+        log_entry = {
+            'created': int(record.created),  # Unix-время, без strftime на каждую запись
+            'name': record.name,
+            'levelname': record.levelname,
+            'message': record.getMessage()
+        }
+        
+        if record.exc_info:
+            log_entry['exc_info'] = self.formatException(record.exc_info)
+        
+        return orjson.dumps(log_entry).decode('utf-8')
+
+
+# Запись лога в памяти (в словарь преобразуется только при выдаче)
+LogEntry = namedtuple('LogEntry', 'timestamp level module message')
+
+
 class TranscriptionLogHandler(logging.Handler):
     """Кастомный обработчик логов для сохранения в память"""
     
     def __init__(self):
         super().__init__()
-        self.logs = []
         self.max_logs = 1000  # Максимальное количество логов в памяти
+        self.logs = deque(maxlen=self.max_logs)  # Старые записи вытесняются автоматически
     
     def emit(self, record):
         try:
             # Форматируем лог
-            log_entry = {
-                'timestamp': datetime.fromtimestamp(record.created).strftime('%H:%M:%S'),
-                'level': record.levelname,
-                'module': record.name,
-                'message': record.getMessage()
-            }
+            log_entry = LogEntry(
+                _format_clock(record.created),
+                record.levelname,
+                record.name,
+                record.getMessage()
+            )
             
-            # Добавляем в список
+            # Добавляем в буфер
             self.logs.append(log_entry)
-            
-            # Ограничиваем количество логов
-            if len(self.logs) > self.max_logs:
-                self.logs = self.logs[-self.max_logs:]
                 
         except Exception:
             self.handleError(record)
@@ -82,8 +151,10 @@ class TranscriptionLogHandler(logging.Handler):
     def get_logs(self, limit: Optional[int] = None):
         """Получить последние логи"""
         if limit:
-            return self.logs[-limit:]
-        return self.logs.copy()
+            entries = islice(self.logs, max(0, len(self.logs) - limit), None)
+        else:
+            entries = self.logs
+        return [entry._asdict() for entry in entries]
     
     def clear_logs(self):
         """Очистить логи"""
@@ -93,11 +164,97 @@ class TranscriptionLogHandler(logging.Handler):
 # Глобальный обработчик логов
 transcription_log_handler = TranscriptionLogHandler()
 
+# Логгер для ошибок на этапе настройки логирования
+_bootstrap_logger = logging.getLogger("bootstrap")
+
+# Директория логов создается один раз за процесс
+_logs_dir_ready = False
+
+# Имена файлов логов вычисляются один раз при импорте
+_LOG_DATE = datetime.now().strftime('%Y%m%d')
+_APP_LOG_NAME = f"app_{_LOG_DATE}.log"
+_ERROR_LOG_NAME = f"errors_{_LOG_DATE}.log"
 
+class BufferedFileHandler(logging.handlers.MemoryHandler):
+    """
+    Буфер записей перед файловым обработчиком
+    
+    Помимо заполнения буфера и записей уровня flushLevel, буфер сбрасывается,
+    когда самая старая запись в нем старше flush_interval секунд, — записи
+    не копятся в памяти надолго и почти не теряются при аварийном завершении.
+    """
+    
+    def __init__(self, capacity: int, flush_interval: float, **kwargs):
+        super().__init__(capacity, **kwargs)
+        self.flush_interval = flush_interval
+    
+    def shouldFlush(self, record):
+        return (
+            super().shouldFlush(record)
+            or record.created - self.buffer[0].created >= self.flush_interval
+        )
+
+
+# Общие для всех логгеров файловые обработчики (создаются при первом обращении)
+_file_handlers = None
+
+
+def _get_file_handlers():
+    """
+    Получение общих файловых обработчиков (общий лог и лог ошибок)
+    
+    Файлы открываются лениво (delay=True). Записи общего лога копятся в небольшом
+    буфере и сбрасываются пачкой — при заполнении буфера, раз в секунду или сразу
+    при записи уровня WARNING и выше. Лог ошибок пишется без буфера.
+    
+    Returns:
+        Кортеж (обработчик общего лога, обработчик ошибок)
+    """
+    global _file_handlers
+    
+    if _file_handlers is not None:
+        return _file_handlers
+    
+    # JSON форматтер для файлов
+    json_formatter = FastJsonFormatter()
+    
+    # Общий лог файл
+    app_file_handler = logging.FileHandler(
+        os.path.join(settings.LOGS_DIR_STR, _APP_LOG_NAME),
+        encoding='utf-8',
+        delay=True
+    )
+    app_file_handler.setFormatter(json_formatter)
+    
+    file_handler = BufferedFileHandler(
+        capacity=32,
+        flush_interval=1.0,
+        flushLevel=logging.WARNING,
+        target=app_file_handler
+    )
+    file_handler.setLevel(logging.DEBUG)
+    
+    # Лог ошибок: каждая запись и так сбрасывалась бы сразу, буфер не нужен
+    error_handler = logging.FileHandler(
+        os.path.join(settings.LOGS_DIR_STR, _ERROR_LOG_NAME),
+        encoding='utf-8',
+        delay=True
+    )
+    error_handler.setFormatter(json_formatter)
+    error_handler.setLevel(logging.ERROR)
+    
+    _file_handlers = (file_handler, error_handler)
+    return _file_handlers
+
+
+@lru_cache(maxsize=None)
 def setup_logger(name: str, level: int = logging.INFO) -> logging.Logger:
     """
     Настройка логгера с цветным выводом и файловым логированием
     
+    Результат кэшируется по (name, level): повторные вызовы,
+    например из ProgressLogger, не выполняют настройку заново.
+    
     Args:
         name: Имя логгера (обычно __name__)
         level: Уровень логирования
@@ -110,17 +267,27 @@ def setup_logger(name: str, level: int = logging.INFO) -> logging.Logger:
     logger = logging.getLogger(name)
     logger.setLevel(level)
     
+    # Все обработчики висят на самом логгере: не передаем записи родителям,
+    # иначе настроенный родитель выведет ту же запись повторно
+    logger.propagate = False
+    
     # Проверяем, не настроен ли уже логгер
     if logger.handlers:
         return logger
     
-    # Создаем директорию для логов с обработкой ошибок
-    try:
-        settings.LOGS_DIR.mkdir(exist_ok=True)
-    except Exception as e:
-        # Если не удается создать директорию, используем текущую
-        settings.LOGS_DIR = Path(".")
-        print(f"⚠️ Не удалось создать директорию logs: {e}, используем текущую директорию")
+    # Создаем директорию для логов с обработкой ошибок (только при первом вызове)
+    global _logs_dir_ready
+    if not _logs_dir_ready:
+        try:
+            settings.LOGS_DIR.mkdir(exist_ok=True)
+        except Exception as e:
+            # Если не удается создать директорию, используем текущую
+            settings.LOGS_DIR = Path(".")
+            settings.LOGS_DIR_STR = "."
+            _bootstrap_logger.warning(
+                "⚠️ Не удалось создать директорию logs: %s, используем текущую директорию", e
+            )
+        _logs_dir_ready = True
     
     # === КОНСОЛЬНЫЙ ВЫВОД ===
     console_handler = logging.StreamHandler(sys.stdout)
@@ -129,28 +296,9 @@ def setup_logger(name: str, level: int = logging.INFO) -> logging.Logger:
     logger.addHandler(console_handler)
     
     # === ФАЙЛОВОЕ ЛОГИРОВАНИЕ ===
-    # Общий лог файл
-    file_handler = logging.FileHandler(
-        settings.LOGS_DIR / f"app_{datetime.now().strftime('%Y%m%d')}.log",
-        encoding='utf-8'
-    )
-    file_handler.setLevel(logging.DEBUG)
-    
-    # JSON форматтер для файлов
-    json_formatter = jsonlogger.JsonFormatter(
-        '%(asctime)s %(name)s %(levelname)s %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    file_handler.setFormatter(json_formatter)
+    # Общий лог файл и лог ошибок разделяются всеми логгерами
+    file_handler, error_handler = _get_file_handlers()
     logger.addHandler(file_handler)
-    
-    # === ОБРАБОТЧИК ОШИБОК ===
-    error_handler = logging.FileHandler(
-        settings.LOGS_DIR / f"errors_{datetime.now().strftime('%Y%m%d')}.log",
-        encoding='utf-8'
-    )
-    error_handler.setLevel(logging.ERROR)
-    error_handler.setFormatter(json_formatter)
     logger.addHandler(error_handler)
     
     # === КАСТОМНЫЙ ОБРАБОТЧИК ДЛЯ ВЕБ-ИНТЕРФЕЙСА ===
@@ -178,6 +326,16 @@ def clear_logs():
     transcription_log_handler.clear_logs()
 
 
+# Готовые строки прогресс-бара для каждого процента 0..100
+_PROGRESS_BAR_LENGTH = 20
+_PROGRESS_BARS = tuple(
+    '[' + '█' * (_PROGRESS_BAR_LENGTH * percentage // 100)
+    + '░' * (_PROGRESS_BAR_LENGTH - _PROGRESS_BAR_LENGTH * percentage // 100)
+    + f'] {percentage:3d}%'
+    for percentage in range(101)
+)
+
+
 class ProgressLogger:
     """Класс для логирования прогресса длительных операций"""
     
@@ -185,7 +343,12 @@ class ProgressLogger:
         self.logger = setup_logger(f"progress.{name}")
         self.total_steps = total_steps
         self.current_step = 0
-        self.start_time = datetime.now()
+        self.start_time = time.monotonic()
+    
+    def _elapsed_str(self) -> str:
+        """Время с начала операции в формате H:MM:SS"""
+        elapsed = int(time.monotonic() - self.start_time)
+        return f"{elapsed // 3600}:{elapsed // 60 % 60:02d}:{elapsed % 60:02d}"
     
     def update(self, step: int, message: str = ""):
         """
@@ -201,16 +364,10 @@ class ProgressLogger:
         percentage = min(100, max(0, step))
         
         # Вычисляем время выполнения
-        elapsed = datetime.now() - self.start_time
-        elapsed_str = str(elapsed).split('.')[0]  # Убираем микросекунды
-        
-        # Создаем прогресс-бар
-        bar_length = 20
-        filled_length = int(bar_length * percentage // 100)
-        bar = '█' * filled_length + '░' * (bar_length - filled_length)
+        elapsed_str = self._elapsed_str()
         
-        # Логируем прогресс
-        progress_msg = f"[{bar}] {percentage:3d}% | {elapsed_str}"
+        # Логируем прогресс (бар берется из готовой таблицы)
+        progress_msg = f"{_PROGRESS_BARS[percentage]} | {elapsed_str}"
         if message:
             progress_msg += f" | {message}"
         
@@ -223,10 +380,9 @@ class ProgressLogger:
         Args:
             final_message: Финальное сообщение
         """
-        elapsed = datetime.now() - self.start_time
-        elapsed_str = str(elapsed).split('.')[0]
+        elapsed_str = self._elapsed_str()
         
-        self.logger.info(f"✅ {final_message} | Время выполнения: {elapsed_str}")
+        self.logger.info("✅ %s | Время выполнения: %s", final_message, elapsed_str)
     
     def error(self, error_message: str):
         """
@@ -235,7 +391,6 @@ class ProgressLogger:
         Args:
             error_message: Сообщение об ошибке
         """
-        elapsed = datetime.now() - self.start_time
-        elapsed_str = str(elapsed).split('.')[0]
+        elapsed_str = self._elapsed_str()
         
-        self.logger.error(f"❌ {error_message} | Время до ошибки: {elapsed_str}")
+        self.logger.error("❌ %s | Время до ошибки: %s", error_message, elapsed_str)
@@ -0,0 +1,110 @@
+"""
+Общие компоненты микросервисов
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, BinaryIO, Callable, Dict, Tuple
+
+import orjson
+from fastapi import FastAPI
+
+from app.core.config import settings
+
+# Размер блока при сохранении загружаемых файлов (1 МБ)
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Кэш готовых тел ответа /health по имени сервиса: (секунда, JSON в байтах)
+_health_body_cache: Dict[str, Tuple[int, bytes]] = {}
+
+
+def startup_lifespan(startup: Callable[[], Awaitable[None]], background: bool = False):
+    """
+    Жизненный цикл микросервиса, выполняющий инициализацию при запуске
+
+    Args:
+        startup: Корутина инициализации
+        background: Выполнять инициализацию в фоне: сервер начинает принимать
+            запросы сразу, а готовность сервис сообщает сам (например, /readiness)
+
+    Returns:
+        Функция lifespan для FastAPI
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if not background:
+            await startup()
+            yield
+            return
+
+        startup_task = asyncio.create_task(startup())
+        try:
+            yield
+        finally:
+            startup_task.cancel()
+
+    return lifespan
+
+
+def health_body(service_name: str) -> bytes:
+    """
+    Тело ответа /health, сериализуется не чаще раза в секунду
+
+    Args:
+        service_name: Имя сервиса в ответе
+
+    Returns:
+        JSON в байтах
+    """
+    now = int(time.time())
+    cached = _health_body_cache.get(service_name)
+
+    if cached is not None and cached[0] == now:
+        return cached[1]
+
+    body = orjson.dumps({
+        "status": "healthy",
+        "service": service_name,
+        "timestamp": datetime.fromtimestamp(now).isoformat()
+    })
+    _health_body_cache[service_name] = (now, body)
+    return body
+
+
+def save_upload(source: BinaryIO, task_id: str, file_extension: str) -> Tuple[Path, str]:
+    """
+    Сохранение загруженного файла во временный файл с уникальным именем
+    блоками по UPLOAD_CHUNK_SIZE
+
+    Файлы с одинаковым именем от разных запросов (и воркеров) не перезаписывают
+    друг друга. Функция блокирующая — вызывается через asyncio.to_thread.
+
+    Args:
+        source: Файловый объект загрузки (UploadFile.file)
+        task_id: ID задачи (префикс имени файла)
+        file_extension: Расширение файла
+
+    Returns:
+        (путь к сохраненному файлу, sha256 содержимого в hex)
+    """
+    hasher = hashlib.sha256()
+    fd, name = tempfile.mkstemp(dir=settings.UPLOAD_DIR, prefix=f"{task_id}_", suffix=file_extension)
+    file_path = Path(name)
+
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                hasher.update(chunk)
+                f.write(chunk)
+    except Exception:
+        file_path.unlink(missing_ok=True)
+        raise
+
+    return file_path, hasher.hexdigest()
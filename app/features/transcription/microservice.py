@@ -3,41 +3,33 @@
 """
 
 import os
+import asyncio
 import logging
-from datetime import datetime
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
-import uvicorn
 from fastapi import FastAPI, File, UploadFile, HTTPException, Form
-from fastapi.responses import JSONResponse
-import aiofiles
+from fastapi.responses import ORJSONResponse, Response
 
 from app.core.config import settings
 from app.core.logger import setup_logger
+from app.core.microservice import health_body, save_upload, startup_lifespan
 from app.features.transcription.service import TranscriptionService
 
 # Настройка логирования
 logger = setup_logger(__name__)
 
-# Создание FastAPI приложения
-app = FastAPI(
-    title="Transcription Microservice",
-    description="Микросервис для транскрипции аудио/видео файлов",
-    version="1.0.0"
-)
-
-# Создание директорий
-settings.create_directories()
-
-# Инициализация сервиса транскрипции
-transcription_service = None
-
 
-@app.on_event("startup")
 async def startup_event():
-    """Инициализация при запуске приложения"""
-    global transcription_service
+    """
+    Инициализация при запуске приложения
+    
+    Выполняется в фоне: загрузка и прогрев моделей занимают минуты, а сервер
+    тем временем отвечает на /health и /readiness.
+    """
+    global transcription_service, startup_failed
     
     logger.info("🚀 Запуск микросервиса транскрипции...")
     
@@ -49,8 +41,39 @@ async def startup_event():
         logger.info("✅ Микросервис транскрипции успешно инициализирован")
         
     except Exception as e:
-        logger.error(f"❌ Ошибка при инициализации сервиса транскрипции: {e}")
-        raise
+        startup_failed = True
+        logger.error("❌ Ошибка при инициализации сервиса транскрипции: %s", e)
+
+
+# Создание FastAPI приложения
+app = FastAPI(
+    title="Transcription Microservice",
+    description="Микросервис для транскрипции аудио/видео файлов",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=startup_lifespan(startup_event, background=True)
+)
+
+# Создание директорий
+settings.create_directories()
+
+# Ограничение числа одновременных транскрипций, чтобы не перегружать модель
+transcription_semaphore = asyncio.Semaphore(settings.TRANSCRIPTION_MAX_PARALLEL)
+
+# Транскрипции, выполняемые прямо сейчас: (имя файла, sha256 содержимого) -> задача.
+# Одинаковые файлы, загруженные одновременно, обрабатываются один раз: каждый запрос
+# сохраняет свою копию, после сверки хэша копии дубликатов сразу удаляются
+_inflight_transcriptions: Dict[Tuple[str, str], asyncio.Task] = {}
+
+# Кэш готовых результатов: (имя файла, sha256 содержимого) -> (время сохранения, результаты).
+# Порядок ключей — от давно использованных к недавним (LRU)
+_result_cache: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+# Инициализация сервиса транскрипции
+transcription_service = None
+
+# Инициализация завершилась ошибкой, сервис не сможет обрабатывать запросы
+startup_failed = False
 
 
 @app.post("/transcribe")
@@ -69,59 +92,184 @@ async def transcribe_file(
         JSON с результатами транскрипции
     """
     
-    logger.info(f"📤 Получен файл для транскрипции: {file.filename} (task_id: {task_id})")
+    logger.info("📤 Получен файл для транскрипции: %s (task_id: %s)", file.filename, task_id)
+    
+    # Пока модели загружаются (или если загрузка не удалась), запросы не принимаем
+    if transcription_service is None or not transcription_service.is_loaded:
+        raise HTTPException(
+            status_code=503,
+            detail="Ошибка инициализации моделей" if startup_failed else "Модели еще загружаются, повторите позже"
+        )
     
     # Проверка формата файла
     file_extension = Path(file.filename).suffix.lower()
     if file_extension not in settings.ALL_SUPPORTED_FORMATS:
-        logger.error(f"❌ Неподдерживаемый формат файла: {file_extension}")
+        logger.error("❌ Неподдерживаемый формат файла: %s", file_extension)
         raise HTTPException(
             status_code=400,
             detail=f"Неподдерживаемый формат файла. Поддерживаемые форматы: {', '.join(settings.ALL_SUPPORTED_FORMATS)}"
         )
     
     try:
-        # Сохранение загруженного файла
-        file_path = settings.UPLOAD_DIR / file.filename
+        # Сохранение загруженного файла под уникальным именем: файлы с одинаковым
+        # именем от разных запросов не должны перезаписывать друг друга.
+        # Копируем файл частями в одном рабочем потоке (без переключения
+        # в пул потоков на каждый блок) и попутно считаем хэш содержимого
+        file_path, digest = await asyncio.to_thread(
+            save_upload, file.file, task_id, file_extension
+        )
         
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
+        logger.info("💾 Файл сохранен: %s", file_path)
         
-        logger.info(f"💾 Файл сохранен: {file_path}")
+        key = (file.filename, digest)
         
-        # Выполнение транскрипции
-        results = await transcription_service.transcribe_file(
-            file_path=file_path,
-            file_extension=file_extension,
-            task_id=task_id,
-            progress_callback=None,  # В микросервисе не нужен callback
-            log_callback=lambda level, msg: logger.info(f"[{level}] {msg}")
-        )
+        # Этот же файл уже транскрибировался недавно — отдаем готовый результат
+        results = _get_cached_result(key)
+        if results is not None:
+            logger.info("♻️ Результат транскрипции взят из кэша (task_id: %s)", task_id)
+            _remove_upload(file_path)
+            return ORJSONResponse(results)
+        
+        # Если такой же файл уже транскрибируется — ждем его результат
+        task = _inflight_transcriptions.get(key)
         
-        # Удаление временного файла
-        try:
-            if file_path.exists():
-                file_path.unlink()
-                logger.info("🗑️ Временный файл удален")
-        except Exception as e:
-            logger.warning(f"⚠️ Не удалось удалить временный файл: {e}")
+        if task is None:
+            task = asyncio.create_task(
+                _run_transcription(file_path, file_extension, task_id, file.filename)
+            )
+            _inflight_transcriptions[key] = task
+            task.add_done_callback(lambda _: _inflight_transcriptions.pop(key, None))
+        else:
+            # Транскрибируется копия первого запроса, наша копия не нужна
+            logger.info("🔁 Такой же файл уже обрабатывается, ожидаем результат (task_id: %s)", task_id)
+            _remove_upload(file_path)
         
-        return JSONResponse(results)
+        # shield: отмена одного запроса не прерывает транскрипцию для остальных
+        results = await asyncio.shield(task)
+        _cache_result(key, results)
+        
+        return ORJSONResponse(results)
         
     except Exception as e:
-        logger.error(f"❌ Ошибка при транскрипции: {e}")
+        logger.error("❌ Ошибка при транскрипции: %s", e)
         raise HTTPException(status_code=500, detail=f"Ошибка транскрипции: {str(e)}")
 
 
+async def _run_transcription(
+    file_path: Path,
+    file_extension: str,
+    task_id: str,
+    filename: str
+) -> Dict[str, Any]:
+    """
+    Транскрипция сохраненного файла с последующим удалением
+    
+    Args:
+        file_path: Путь к сохраненному файлу
+        file_extension: Расширение файла
+        task_id: ID задачи
+        filename: Исходное имя загруженного файла
+        
+    Returns:
+        Результаты транскрипции
+    """
+    
+    try:
+        # Выполнение транскрипции (не больше TRANSCRIPTION_MAX_PARALLEL одновременно)
+        async with transcription_semaphore:
+            return await transcription_service.transcribe_file(
+                file_path=file_path,
+                file_extension=file_extension,
+                task_id=task_id,
+                progress_callback=None,  # В микросервисе не нужен callback
+                log_callback=lambda level, msg: logger.info("[%s] %s", level, msg),
+                filename=filename
+            )
+    finally:
+        _remove_upload(file_path)
+
+
+def _remove_upload(file_path: Path):
+    """Удаление временного файла загрузки"""
+    try:
+        if file_path.exists():
+            file_path.unlink()
+            logger.info("🗑️ Временный файл удален")
+    except Exception as e:
+        logger.warning("⚠️ Не удалось удалить временный файл: %s", e)
+
+
+def _get_cached_result(key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Получение результата транскрипции из кэша
+    
+    Args:
+        key: (имя файла, sha256 содержимого)
+        
+    Returns:
+        Результаты транскрипции или None, если записи нет или она устарела
+    """
+    entry = _result_cache.get(key)
+    if entry is None:
+        return None
+    
+    cached_at, results = entry
+    if time.monotonic() - cached_at > settings.TRANSCRIPTION_CACHE_TTL:
+        del _result_cache[key]
+        return None
+    
+    _result_cache.move_to_end(key)
+    return results
+
+
+def _cache_result(key: Tuple[str, str], results: Dict[str, Any]):
+    """
+    Сохранение результата транскрипции в кэш (вытесняются самые старые записи)
+    
+    Args:
+        key: (имя файла, sha256 содержимого)
+        results: Результаты транскрипции
+    """
+    if settings.TRANSCRIPTION_CACHE_SIZE <= 0:
+        return
+    
+    _result_cache[key] = (time.monotonic(), results)
+    _result_cache.move_to_end(key)
+    
+    while len(_result_cache) > settings.TRANSCRIPTION_CACHE_SIZE:
+        _result_cache.popitem(last=False)
+
+
 @app.get("/health")
 async def health_check():
-    """Проверка состояния микросервиса"""
-    return {
-        "status": "healthy",
-        "service": "transcription",
-        "timestamp": datetime.now().isoformat()
-    }
+    """Проверка состояния микросервиса (процесс жив и инициализация не провалилась)"""
+    
+    if startup_failed:
+        return ORJSONResponse(
+            status_code=503,
+            content={"status": "unhealthy", "service": "transcription"}
+        )
+    
+    return Response(content=health_body("transcription"), media_type="application/json")
+
+
+@app.get("/readiness")
+async def readiness_check():
+    """Готовность микросервиса принимать запросы (модели загружены и прогреты)"""
+    
+    if startup_failed:
+        status = "failed"
+    elif transcription_service is None or not transcription_service.is_loaded:
+        status = "starting"
+    elif not transcription_service.is_ready:
+        status = "cold"  # Модели загружены, но прогрев не удался или еще идет
+    else:
+        return {"status": "ready", "service": "transcription"}
+    
+    return ORJSONResponse(
+        status_code=503,
+        content={"status": status, "service": "transcription"}
+    )
 
 
 if __name__ == "__main__":
@@ -131,12 +279,14 @@ if __name__ == "__main__":
     port = int(os.getenv("PORT", 8001))
     host = os.getenv("HOST", "0.0.0.0")
     
-    logger.info(f"🚀 Запуск микросервиса транскрипции на {host}:{port}")
+    logger.info("🚀 Запуск микросервиса транскрипции на %s:%s", host, port)
     
     uvicorn.run(
         "app.features.transcription.microservice:app",
         host=host,
         port=port,
         reload=False,
+        loop=settings.UVICORN_LOOP,
+        http=settings.UVICORN_HTTP,
         log_level=settings.LOG_LEVEL.lower()
     )
@@ -3,22 +3,62 @@
 """
 
 import os
-import torch
+import re
+import asyncio
+import time
 import whisperx
+from whisperx.audio import log_mel_spectrogram
 import librosa
 import numpy as np
 from pathlib import Path
 from typing import Optional, Callable, Dict, List, Any
 from datetime import datetime
-import tempfile
 import gc
-import subprocess
 
 from app.core.logger import setup_logger
 from app.core.config import settings
 
 logger = setup_logger(__name__)
 
+# Разбиение текста на слова и знаки препинания (для простого выравнивания)
+_WORD_TOKEN_RE = re.compile(r'\b\w+\b|[^\w\s]')
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+
+# Частота дискретизации аудио, которое возвращает whisperx.load_audio
+WHISPER_SAMPLE_RATE = 16000
+
+# Каталог, в котором драйвер NVIDIA публикует сведения о видеокартах
+NVIDIA_GPUS_DIR = Path("/proc/driver/nvidia/gpus")
+
+
+def _detect_gpu_names() -> List[str]:
+    """
+    Имена доступных GPU NVIDIA по данным драйвера
+    
+    Читает /proc вместо обращения к torch.cuda: сервис работает на CPU,
+    и создавать CUDA контекст только ради лога не нужно.
+    
+    Returns:
+        Список имен GPU (пустой, если GPU нет)
+    """
+    names = []
+    
+    try:
+        for info_file in sorted(NVIDIA_GPUS_DIR.glob("*/information")):
+            for line in info_file.read_text().splitlines():
+                if line.startswith("Model:"):
+                    names.append(line.split(":", 1)[1].strip())
+                    break
+    except OSError:
+        pass
+    
+    return names
+
+
+# Набор GPU не меняется за время жизни процесса — проверяем один раз
+GPU_NAMES = _detect_gpu_names()
+CUDA_AVAILABLE = bool(GPU_NAMES)
+
 
 class TranscriptionService:
     """Основной сервис для транскрипции аудио файлов"""
@@ -30,9 +70,12 @@ class TranscriptionService:
         self.diarize_model = None
         self.device = None
         self.compute_type = None
+        self.is_loaded = False  # Модели загружены, можно транскрибировать
+        self.is_ready = False   # Модели загружены и прогреты
+        self.static_metadata_lines = ()  # Неизменяемые строки метаданных результата
         
         # Настройки модели
-        self.model_size = "base"  # tiny, base, small, medium, large-v2, large-v3
+        self.model_size = settings.WHISPER_MODEL  # tiny, base, small, medium, large-v2, large-v3
         self.language = "ru"      # Русский язык
         
         # Настройки обнаружения пауз
@@ -43,45 +86,6 @@ class TranscriptionService:
             'hop_length': 256          # Шаг между кадрами
         }
     
-    def convert_video_to_audio(self, video_path: Path, output_path: Path) -> bool:
-        """Конвертация видео в аудио с помощью ffmpeg"""
-        try:
-            logger.info(f"🎬 Конвертируем видео в аудио: {video_path}")
-            
-            # Команда ffmpeg для конвертации
-            cmd = [
-                'ffmpeg',
-                '-i', str(video_path),
-                '-vn',  # Без видео
-                '-acodec', 'pcm_s16le',  # Кодек аудио
-                '-ar', '16000',  # Частота дискретизации
-                '-ac', '1',  # Моно
-                '-y',  # Перезаписать файл
-                str(output_path)
-            ]
-            
-            # Выполняем команду
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 минут таймаут
-            )
-            
-            if result.returncode == 0:
-                logger.info(f"✅ Видео успешно конвертировано в аудио: {output_path}")
-                return True
-            else:
-                logger.error(f"❌ Ошибка конвертации видео: {result.stderr}")
-                return False
-                
-        except subprocess.TimeoutExpired:
-            logger.error("❌ Таймаут при конвертации видео")
-            return False
-        except Exception as e:
-            logger.error(f"❌ Ошибка при конвертации видео: {e}")
-            return False
-
     def is_video_file(self, file_path: Path) -> bool:
         """Проверка, является ли файл видео"""
         return file_path.suffix.lower() in settings.VIDEO_FORMATS
@@ -93,56 +97,96 @@ class TranscriptionService:
         # Определяем устройство и тип вычислений
         self._setup_device()
         
+        # Модель, устройство и язык не меняются после запуска — строки метаданных
+        # для результатов собираем один раз
+        self.static_metadata_lines = (
+            f"Модель: {self.model_size}",
+            f"Устройство: {self.device}",
+            f"Язык: {self.language}"
+        )
+        
         # Загружаем модель Whisper
         await self._load_whisper_model()
         
         # Загружаем модель для выравнивания
         await self._load_alignment_model()
         
-        logger.info("✅ Сервис транскрипции успешно инициализирован")
+        self.is_loaded = True
+        
+        # Прогреваем модель, чтобы первый запрос не платил за холодный старт
+        self.is_ready = await asyncio.to_thread(self._warmup_model)
+        
+        if self.is_ready:
+            logger.info("✅ Сервис транскрипции успешно инициализирован")
+        else:
+            logger.warning("⚠️ Сервис транскрипции инициализирован без прогрева модели")
+    
+    def _warmup_model(self) -> bool:
+        """
+        Прогрев модели на одном 30-секундном окне
+        
+        Окно подается напрямую в CTranslate2 модель в обход VAD: на тишине VAD
+        не находит речи, и кодировщик с декодером не запускаются вовсе.
+        
+        Returns:
+            True, если прогрев выполнен
+        """
+        logger.info("🔥 Прогреваем модель Whisper...")
+        
+        try:
+            # Негромкий шум длиной в одно окно Whisper (30 сек)
+            audio = np.random.default_rng(0).standard_normal(30 * WHISPER_SAMPLE_RATE).astype(np.float32) * 0.1
+            n_mels = self.model.model.feat_kwargs.get("feature_size") or 80
+            features = log_mel_spectrogram(audio, n_mels=n_mels)[None]  # пакет из одного окна
+            
+            # self.model — конвейер whisperx, пакетная генерация есть у его WhisperModel
+            self.model.model.generate_segment_batched(features, self.model.tokenizer, self.model.options)
+            logger.info("✅ Модель Whisper прогрета")
+            return True
+            
+        except Exception as e:
+            # Прогрев не обязателен — ошибка не должна мешать запуску
+            logger.warning("⚠️ Не удалось прогреть модель Whisper: %s", e)
+            return False
     
     def _setup_device(self):
         """Настройка устройства для вычислений"""
         # Принудительно используем CPU для WhisperX
         self.device = "cpu"
-        self.compute_type = "int8"
+        self.compute_type = settings.WHISPER_COMPUTE_TYPE
         
         # Отключаем CUDA для PyTorch
         os.environ["CUDA_VISIBLE_DEVICES"] = ""
         
-        if torch.cuda.is_available():
-            # Информация о GPU
-            gpu_name = torch.cuda.get_device_name(0)
-            gpu_memory = torch.cuda.get_device_properties(0).total_memory / 1024**3
-            
-            logger.info(f"ℹ️ GPU доступен: {gpu_name} ({gpu_memory:.1f} ГБ), но принудительно используется CPU")
-            
-            # Очищаем кэш GPU
-            torch.cuda.empty_cache()
-            
+        if CUDA_AVAILABLE:
+            logger.info("ℹ️ GPU доступен: %s, но принудительно используется CPU", GPU_NAMES[0])
         else:
             logger.info("ℹ️ CUDA недоступна, используется CPU")
         
-        logger.info(f"🖥️ Устройство для транскрипции: {self.device.upper()}")
-        logger.info(f"⚙️ Тип вычислений: {self.compute_type}")
+        logger.info("🖥️ Устройство для транскрипции: %s", self.device.upper())
+        logger.info("⚙️ Тип вычислений: %s, потоков CPU: %s", self.compute_type, settings.WHISPER_THREADS)
     
     async def _load_whisper_model(self):
         """Загрузка модели WhisperX на CPU"""
-        logger.info(f"📥 Загружаем модель Whisper на CPU: {self.model_size}")
+        logger.info("📥 Загружаем модель Whisper на CPU: %s", self.model_size)
         
         try:
             # Принудительно загружаем модель на CPU
-            self.model = whisperx.load_model(
+            # Загрузка блокирующая (чтение весов с диска/сети) — выполняем в потоке,
+            # чтобы не останавливать event loop
+            self.model = await asyncio.to_thread(
+                whisperx.load_model,
                 self.model_size,
                 device="cpu",  # Принудительно CPU
-                compute_type="int8",  # Оптимизация для CPU
+                compute_type=self.compute_type,  # int8 по умолчанию — оптимизация для CPU
+                threads=settings.WHISPER_THREADS,  # По числу доступных ядер
                 language=self.language
             )
             
-            logger.info(f"✅ Модель Whisper {self.model_size} загружена на CPU")
+            logger.info("✅ Модель Whisper %s загружена на CPU", self.model_size)
             
         except Exception as e:
-            logger.error(f"❌ Ошибка загрузки модели Whisper: {e}")
+            logger.error("❌ Ошибка загрузки модели Whisper: %s", e)
             raise RuntimeError(f"Не удалось загрузить модель Whisper: {e}")
     
     async def _load_alignment_model(self):
@@ -151,7 +195,8 @@ class TranscriptionService:
         
         try:
             # Пробуем загрузить модель для русского языка на CPU
-            self.align_model, metadata = whisperx.load_align_model(
+            self.align_model, metadata = await asyncio.to_thread(
+                whisperx.load_align_model,
                 language_code=self.language,
                 device="cpu"  # Принудительно CPU
             )
@@ -159,53 +204,54 @@ class TranscriptionService:
             logger.info("✅ Модель выравнивания загружена на CPU")
             
         except Exception as e:
-            logger.warning(f"⚠️ Не удалось загрузить модель выравнивания для русского языка: {e}")
+            logger.warning("⚠️ Не удалось загрузить модель выравнивания для русского языка: %s", e)
             
             try:
                 # Пробуем загрузить универсальную модель на CPU
                 logger.info("🔄 Пробуем загрузить универсальную модель выравнивания на CPU...")
-                self.align_model, metadata = whisperx.load_align_model(
+                self.align_model, metadata = await asyncio.to_thread(
+                    whisperx.load_align_model,
                     language_code="en",  # Используем английскую модель как fallback
                     device="cpu"  # Принудительно CPU
                 )
                 logger.info("✅ Универсальная модель выравнивания загружена на CPU")
                 
             except Exception as e2:
-                logger.warning(f"⚠️ Не удалось загрузить универсальную модель выравнивания: {e2}")
+                logger.warning("⚠️ Не удалось загрузить универсальную модель выравнивания: %s", e2)
                 self.align_model = None
     
     def is_cuda_available(self) -> bool:
         """Проверка доступности CUDA"""
-        return torch.cuda.is_available()
+        return CUDA_AVAILABLE
     
     def get_device_info(self) -> dict:
         """Получение информации об устройстве"""
         info = {
             "device": self.device,
             "compute_type": self.compute_type,
-            "cuda_available": torch.cuda.is_available()
+            "cuda_available": CUDA_AVAILABLE
         }
         
-        if torch.cuda.is_available():
+        if CUDA_AVAILABLE:
             info.update({
-                "gpu_name": torch.cuda.get_device_name(0),
-                "gpu_memory_total": torch.cuda.get_device_properties(0).total_memory,
-                "gpu_memory_allocated": torch.cuda.memory_allocated(0),
-                "gpu_memory_cached": torch.cuda.memory_reserved(0)
+                "gpu_name": GPU_NAMES[0],
+                "gpu_count": len(GPU_NAMES)
             })
         
         return info
     
     def _detect_pauses(
         self,
-        audio_path: Path,
+        y: np.ndarray,
+        sr: int,
         log_callback: Optional[Callable[[str, str], None]] = None
     ) -> List[Dict]:
         """
-        Обнаружение пауз в аудио файле
+        Обнаружение пауз в аудио сигнале
         
         Args:
-            audio_path: Путь к аудио файлу
+            y: Аудио сигнал (моно)
+            sr: Частота дискретизации сигнала
             log_callback: Функция для логирования
             
         Returns:
@@ -220,9 +266,6 @@ class TranscriptionService:
         log("INFO", "🔍 Анализируем паузы в аудио...")
         
         try:
-            # Загружаем аудио
-            y, sr = librosa.load(str(audio_path), sr=None)
-            
             # Вычисляем энергию сигнала
             frame_length = self.pause_settings['frame_length']
             hop_length = self.pause_settings['hop_length']
@@ -251,18 +294,18 @@ class TranscriptionService:
             pauses = []
             pause_start = None
             
-            for i, (time, pause) in enumerate(zip(times, is_pause)):
+            for i, (t, pause) in enumerate(zip(times, is_pause)):
                 if pause and pause_start is None:
                     # Начало паузы
-                    pause_start = time
+                    pause_start = t
                 elif not pause and pause_start is not None:
                     # Конец паузы
-                    pause_duration = time - pause_start
+                    pause_duration = t - pause_start
                     
                     if pause_duration >= self.pause_settings['min_pause_duration']:
                         pauses.append({
                             'start': pause_start,
-                            'end': time,
+                            'end': t,
                             'duration': pause_duration
                         })
                     
@@ -292,7 +335,8 @@ class TranscriptionService:
         file_extension: str,
         task_id: str,
         progress_callback: Optional[Callable[[int, str], None]] = None,
-        log_callback: Optional[Callable[[str, str], None]] = None
+        log_callback: Optional[Callable[[str, str], None]] = None,
+        filename: Optional[str] = None
     ) -> Dict[str, str]:
         """
         Транскрибция аудио/видео файла
@@ -303,6 +347,7 @@ class TranscriptionService:
             task_id: ID задачи
             progress_callback: Функция обновления прогресса
             log_callback: Функция логирования
+            filename: Исходное имя файла для результата (по умолчанию имя file_path)
             
         Returns:
             Форматированный текст транскрипции
@@ -317,44 +362,36 @@ class TranscriptionService:
             if progress_callback:
                 progress_callback(percent, message)
         
-        log("INFO", f"🎤 Начинаем транскрипцию файла: {file_path.name}")
-        
-        # Переменные для очистки
-        audio_file_path = None
-        temp_audio_path = None
+        filename = filename or file_path.name
+        log("INFO", f"🎤 Начинаем транскрипцию файла: {filename}")
+        started_at = time.perf_counter()
         
         try:
             update_progress(10, "Подготовка аудио...")
             
-            # Конвертируем в аудио если необходимо
-            if file_extension.lower() in ['.mp4', '.avi', '.mov', '.mkv']:
-                log("INFO", "📹 Конвертируем видео в аудио...")
-                
-                temp_audio_path = Path(tempfile.mkstemp(suffix=".wav")[1])
-                if not self.convert_video_to_audio(file_path, temp_audio_path):
-                    raise RuntimeError("Не удалось конвертировать видео в аудио.")
-                audio_file_path = temp_audio_path
-                
+            # Декодируем аудио один раз: whisperx.load_audio через ffmpeg читает
+            # и видео, и аудио файлы сразу в 16 кГц моно — без промежуточного WAV
+            if file_extension.lower() in settings.SUPPORTED_VIDEO_FORMATS:
+                log("INFO", "📹 Извлекаем аудио из видео...")
             else:
                 log("INFO", "🎵 Используем исходный аудио файл")
-                audio_file_path = file_path
             
-            update_progress(35, "Анализируем пауз...")
+            # Декодирование, анализ и инференс блокирующие — выполняем их в потоке,
+            # чтобы event loop продолжал обслуживать другие запросы
+            audio = await asyncio.to_thread(whisperx.load_audio, str(file_path))
             
-            # Анализ пауз
-            pauses = self._detect_pauses(audio_file_path, log_callback)
-            
-            update_progress(40, "Загружаем аудио в Whisper...")
+            update_progress(35, "Анализируем пауз...")
             
-            # Загружаем аудио для Whisper
-            audio = whisperx.load_audio(str(audio_file_path))
+            # Анализ пауз по уже декодированному сигналу
+            pauses = await asyncio.to_thread(self._detect_pauses, audio, WHISPER_SAMPLE_RATE, log_callback)
             
             update_progress(50, "Выполняем транскрипцию...")
             
             # Основная транскрипция
             log("INFO", f"🎯 Выполняем транскрипцию (модель: {self.model_size}, устройство: {self.device})")
             
-            result = self.model.transcribe(
+            result = await asyncio.to_thread(
+                self.model.transcribe,
                 audio,
                 batch_size=16 if self.device == "cuda" else 4
             )
@@ -366,7 +403,8 @@ class TranscriptionService:
                 try:
                     log("INFO", "🎯 Выравниваем слова по временным меткам...")
                     
-                    result = whisperx.align(
+                    result = await asyncio.to_thread(
+                        whisperx.align,
                         result["segments"],
                         self.align_model,
                         whisperx.utils.get_writer_output_format("json"),
@@ -392,13 +430,13 @@ class TranscriptionService:
             formatted_results = self._format_transcription_result(
                 result,
                 pauses,
-                file_path.name,
+                filename,
                 task_id
             )
             
             update_progress(100, "Транскрипция завершена!")
             
-            log("INFO", "✅ Транскрипция успешно завершена")
+            log("INFO", f"✅ Транскрипция успешно завершена за {time.perf_counter() - started_at:.1f} сек")
             
             return formatted_results
             
@@ -407,16 +445,9 @@ class TranscriptionService:
             raise RuntimeError(f"Ошибка транскрипции: {e}")
             
         finally:
-            # Очистка временных файлов
-            if temp_audio_path and temp_audio_path.exists():
-                try:
-                    temp_audio_path.unlink()
-                    log("INFO", "🗑️ Временный аудио файл удален")
-                except Exception as e:
-                    log("WARNING", f"⚠️ Не удалось удалить временный файл: {e}")
-            
-            # Очистка GPU памяти
+            # Очистка GPU памяти (torch нужен только здесь, поэтому импортируется лениво)
             if self.device == "cuda":
+                import torch
                 torch.cuda.empty_cache()
                 gc.collect()
     
@@ -439,8 +470,7 @@ class TranscriptionService:
             end_time = segment.get('end', 0)
             
             # Разбиваем текст на слова, сохраняя знаки препинания
-            import re
-            words = re.findall(r'\b\w+\b|[^\w\s]', text)
+            words = _WORD_TOKEN_RE.findall(text)
             if not words:
                 continue
             
@@ -450,7 +480,7 @@ class TranscriptionService:
             # Учитываем, что знаки препинания произносятся быстрее
             word_durations = []
             for word in words:
-                if re.match(r'[^\w\s]', word):  # Знак препинания
+                if _PUNCTUATION_RE.match(word):  # Знак препинания
                     word_durations.append(0.1)  # Короткая пауза для знаков препинания
                 else:
                     # Примерная длительность слова (0.3-0.8 секунды)
@@ -504,6 +534,13 @@ class TranscriptionService:
         
         segments = whisper_result.get("segments", [])
         
+        # Метаданные общие для обоих файлов — собираем один раз
+        metadata_lines = [
+            f"Файл: {filename}",
+            *self.static_metadata_lines,
+            f"Время обработки: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        ]
+        
         # 1. Простой текст (только полный текст)
         simple_lines = []
         simple_lines.append("ТРАНСКРИПЦИЯ ВИДЕО")
@@ -511,11 +548,7 @@ class TranscriptionService:
         simple_lines.append("")
         
         # Метаданные
-        simple_lines.append(f"Файл: {filename}")
-        simple_lines.append(f"Модель: {self.model_size}")
-        simple_lines.append(f"Устройство: {self.device}")
-        simple_lines.append(f"Язык: {self.language}")
-        simple_lines.append(f"Время обработки: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        simple_lines.extend(metadata_lines)
         simple_lines.append("")
         
         # Полный текст
@@ -536,11 +569,7 @@ class TranscriptionService:
         detailed_lines.append("")
         
         # Метаданные
-        detailed_lines.append(f"Файл: {filename}")
-        detailed_lines.append(f"Модель: {self.model_size}")
-        detailed_lines.append(f"Устройство: {self.device}")
-        detailed_lines.append(f"Язык: {self.language}")
-        detailed_lines.append(f"Время обработки: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        detailed_lines.extend(metadata_lines)
         detailed_lines.append(f"Обнаружено пауз: {len(pauses)}")
         detailed_lines.append("")
         
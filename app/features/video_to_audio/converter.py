@@ -2,6 +2,9 @@
 Конвертер видео в аудио с использованием FFmpeg
 """
 
+import os
+import re
+import shutil
 import subprocess
 import tempfile
 from pathlib import Path
@@ -13,6 +16,30 @@ from app.core.config import settings
 
 logger = setup_logger(__name__)
 
+# Размер одного сэмпла pcm_s16le в байтах
+PCM_S16LE_SAMPLE_WIDTH = 2
+
+# Текущая позиция в выводе FFmpeg: time=HH:MM:SS.ss
+FFMPEG_TIME_RE = re.compile(r'time=(\d+):(\d{2}):(\d{2}(?:\.\d+)?)')
+
+
+def _parse_frame_rate(rate: str) -> float:
+    """
+    Частота кадров из дроби ffprobe (например, "30000/1001")
+    
+    Args:
+        rate: Строка r_frame_rate
+        
+    Returns:
+        Кадров в секунду (0.0 для некорректного значения)
+    """
+    numerator, _, denominator = rate.partition('/')
+    
+    try:
+        return int(numerator) / int(denominator or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
 
 class VideoToAudioConverter:
     """Класс для конвертации видео в аудио"""
@@ -35,7 +62,6 @@ class VideoToAudioConverter:
     
     def _check_ffmpeg_installation(self) -> str:
         """Проверка установки FFmpeg"""
-        import os
         
         # Список возможных путей к FFmpeg (кроссплатформенный)
         ffmpeg_paths = [
@@ -54,7 +80,13 @@ class VideoToAudioConverter:
         
         ffmpeg_found = False
         
-        for ffmpeg_path in ffmpeg_paths:
+        for candidate in ffmpeg_paths:
+            # Сначала ищем исполняемый файл без запуска процесса:
+            # subprocess запускается только для реально существующего пути
+            ffmpeg_path = shutil.which(candidate)
+            if ffmpeg_path is None:
+                continue
+            
             try:
                 result = subprocess.run(
                     [ffmpeg_path, '-version'],
@@ -65,8 +97,8 @@ class VideoToAudioConverter:
                 
                 if result.returncode == 0:
                     version_info = result.stdout.split('\n')[0]
-                    logger.info(f"✅ FFmpeg найден: {version_info}")
-                    logger.info(f"📍 Путь: {ffmpeg_path}")
+                    logger.info("✅ FFmpeg найден: %s", version_info)
+                    logger.info("📍 Путь: %s", ffmpeg_path)
                     ffmpeg_found = True
                     break
                     
@@ -77,7 +109,7 @@ class VideoToAudioConverter:
             logger.error("❌ FFmpeg не найден в системе")
             logger.error("🔍 Проверенные пути:")
             for path in ffmpeg_paths:
-                logger.error(f"   - {path}")
+                logger.error("   - %s", path)
             raise RuntimeError(
                 "FFmpeg не установлен. Установите FFmpeg:\n"
                 "Windows: choco install ffmpeg или скачайте с https://ffmpeg.org/\n"
@@ -120,7 +152,7 @@ class VideoToAudioConverter:
         Returns:
             Словарь с информацией о файле
         """
-        logger.info(f"📊 Получаем информацию о файле: {file_path.name}")
+        logger.info("📊 Получаем информацию о файле: %s", file_path.name)
         
         try:
             # Используем ffmpeg.probe без указания cmd - он сам найдет ffprobe
@@ -164,14 +196,14 @@ class VideoToAudioConverter:
                     'video_codec': video_stream.get('codec_name', 'unknown'),
                     'video_width': int(video_stream.get('width', 0)),
                     'video_height': int(video_stream.get('height', 0)),
-                    'video_fps': eval(video_stream.get('r_frame_rate', '0/1'))
+                    'video_fps': _parse_frame_rate(video_stream.get('r_frame_rate', '0/1'))
                 })
             
-            logger.info(f"📋 Информация о файле: {info}")
+            logger.debug("📋 Информация о файле: %s", info)
             return info
             
         except Exception as e:
-            logger.error(f"❌ Ошибка при получении информации о файле: {e}")
+            logger.error("❌ Ошибка при получении информации о файле: %s", e)
             raise RuntimeError(f"Не удалось получить информацию о файле: {e}")
     
     def convert_to_audio(
@@ -275,29 +307,20 @@ class VideoToAudioConverter:
                     line = output.decode('utf-8', errors='ignore').strip()
                     
                     # Парсим прогресс из вывода FFmpeg
-                    if 'time=' in line and duration > 0:
-                        try:
-                            time_str = line.split('time=')[1].split()[0]
-                            # Конвертируем время в секунды
-                            time_parts = time_str.split(':')
-                            if len(time_parts) == 3:
-                                current_time = (
-                                    float(time_parts[0]) * 3600 +
-                                    float(time_parts[1]) * 60 +
-                                    float(time_parts[2])
-                                )
-                                
-                                # Вычисляем прогресс (от 20% до 90%)
-                                progress = min(90, 20 + int((current_time / duration) * 70))
-                                
-                                if progress > last_progress:
-                                    update_progress(
-                                        progress,
-                                        f"Конвертация: {current_time:.1f}s / {duration:.1f}s"
-                                    )
-                                    last_progress = progress
-                        except:
-                            pass  # Игнорируем ошибки парсинга
+                    match = FFMPEG_TIME_RE.search(line) if duration > 0 else None
+                    if match:
+                        hours, minutes, seconds = match.groups()
+                        current_time = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+                        
+                        # Вычисляем прогресс (от 20% до 90%)
+                        progress = min(90, 20 + int((current_time / duration) * 70))
+                        
+                        if progress > last_progress:
+                            update_progress(
+                                progress,
+                                f"Конвертация: {current_time:.1f}s / {duration:.1f}s"
+                            )
+                            last_progress = progress
                     
                     # Логируем важные сообщения
                     if any(keyword in line.lower() for keyword in ['error', 'warning']):
@@ -321,14 +344,16 @@ class VideoToAudioConverter:
             if output_size == 0:
                 raise RuntimeError("Выходной файл пустой")
             
-            # Получаем информацию о результате
-            result_info = self.get_media_info(output_path)
+            # Параметры результата известны заранее (PCM с фиксированными настройками),
+            # поэтому длительность считаем по размеру, без повторного запуска ffprobe
+            sample_rate = self.OPTIMAL_AUDIO_SETTINGS['sample_rate']
+            channels = self.OPTIMAL_AUDIO_SETTINGS['channels']
+            output_duration = output_size / (sample_rate * channels * PCM_S16LE_SAMPLE_WIDTH)
             
-            log("INFO", f"✅ Конвертация завершена успешно:")
-            log("INFO", f"   📄 Размер файла: {output_size / (1024*1024):.2f} МБ")
-            log("INFO", f"   🎵 Длительность: {result_info['duration']:.2f} сек")
-            log("INFO", f"   📊 Частота: {result_info.get('audio_sample_rate', 'N/A')} Гц")
-            log("INFO", f"   🔊 Каналы: {result_info.get('audio_channels', 'N/A')}")
+            log("INFO", (
+                f"✅ Конвертация завершена успешно: {output_size / (1024*1024):.2f} МБ, "
+                f"{output_duration:.2f} сек, {sample_rate} Гц, каналов: {channels}"
+            ))
             
             update_progress(100, "Конвертация завершена!")
             
@@ -356,6 +381,6 @@ class VideoToAudioConverter:
         try:
             if file_path.exists() and file_path.name.startswith('tmp'):
                 file_path.unlink()
-                logger.info(f"🗑️ Удален временный файл: {file_path.name}")
+                logger.info("🗑️ Удален временный файл: %s", file_path.name)
         except Exception as e:
-            logger.warning(f"⚠️ Не удалось удалить временный файл {file_path}: {e}")
+            logger.warning("⚠️ Не удалось удалить временный файл %s: %s", file_path, e)
@@ -3,38 +3,23 @@
 """
 
 import os
+import asyncio
 import logging
-from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict, Any
 
-import uvicorn
 from fastapi import FastAPI, File, UploadFile, HTTPException, Form
-from fastapi.responses import JSONResponse
-import aiofiles
+from fastapi.responses import ORJSONResponse, Response
 
 from app.core.config import settings
 from app.core.logger import setup_logger
+from app.core.microservice import health_body, save_upload, startup_lifespan
 from app.features.video_to_audio.converter import VideoToAudioConverter
 
 # Настройка логирования
 logger = setup_logger(__name__)
 
-# Создание FastAPI приложения
-app = FastAPI(
-    title="Video Converter Microservice",
-    description="Микросервис для конвертации видео в аудио",
-    version="1.0.0"
-)
-
-# Создание директорий
-settings.create_directories()
-
-# Инициализация конвертера
-video_converter = None
-
 
-@app.on_event("startup")
 async def startup_event():
     """Инициализация при запуске приложения"""
     global video_converter
@@ -48,10 +33,30 @@ async def startup_event():
         logger.info("✅ Микросервис конвертации видео успешно инициализирован")
         
     except Exception as e:
-        logger.error(f"❌ Ошибка при инициализации конвертера: {e}")
+        logger.error("❌ Ошибка при инициализации конвертера: %s", e)
         raise
 
 
+# Создание FastAPI приложения
+app = FastAPI(
+    title="Video Converter Microservice",
+    description="Микросервис для конвертации видео в аудио",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=startup_lifespan(startup_event)
+)
+
+# Создание директорий
+settings.create_directories()
+
+# Ограничение числа одновременных конвертаций в этом воркере, чтобы не перегружать CPU
+# (воркеров WEB_CONCURRENCY, у каждого свой семафор)
+conversion_semaphore = asyncio.Semaphore(settings.CONVERTER_MAX_PARALLEL)
+
+# Инициализация конвертера
+video_converter = None
+
+
 @app.post("/convert")
 async def convert_video_to_audio(
     file: UploadFile = File(...),
@@ -68,26 +73,25 @@ async def convert_video_to_audio(
         JSON с результатами конвертации
     """
     
-    logger.info(f"📤 Получен файл для конвертации: {file.filename} (task_id: {task_id})")
+    logger.info("📤 Получен файл для конвертации: %s (task_id: %s)", file.filename, task_id)
     
     # Проверка формата файла
     file_extension = Path(file.filename).suffix.lower()
     if file_extension not in settings.VIDEO_FORMATS:
-        logger.error(f"❌ Неподдерживаемый формат видео файла: {file_extension}")
+        logger.error("❌ Неподдерживаемый формат видео файла: %s", file_extension)
         raise HTTPException(
             status_code=400,
             detail=f"Неподдерживаемый формат видео файла. Поддерживаемые форматы: {', '.join(settings.VIDEO_FORMATS)}"
         )
     
+    file_path = None
+    
     try:
-        # Сохранение загруженного файла
-        file_path = settings.UPLOAD_DIR / file.filename
+        # Сохранение загруженного файла под уникальным именем: воркеров несколько,
+        # и файлы с одинаковым именем не должны перезаписывать друг друга
+        file_path, _ = await asyncio.to_thread(save_upload, file.file, task_id, file_extension)
         
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
-        
-        logger.info(f"💾 Файл сохранен: {file_path}")
+        logger.info("💾 Файл сохранен: %s", file_path)
         
         # Проверяем, что это видео файл
         if not video_converter.is_video_file(file_path):
@@ -96,22 +100,18 @@ async def convert_video_to_audio(
         # Конвертация в аудио
         output_path = settings.OUTPUT_DIR / f"{task_id}_audio.wav"
         
-        audio_file = video_converter.convert_to_audio(
-            file_path,
-            output_path=output_path,
-            progress_callback=None,  # В микросервисе не нужен callback
-            log_callback=lambda level, msg: logger.info(f"[{level}] {msg}")
-        )
-        
-        # Удаление временного файла
-        try:
-            if file_path.exists():
-                file_path.unlink()
-                logger.info("🗑️ Временный файл удален")
-        except Exception as e:
-            logger.warning(f"⚠️ Не удалось удалить временный файл: {e}")
+        # Конвертация блокирующая (ffmpeg + чтение stderr), выполняем вне event loop
+        # (не больше CONVERTER_MAX_PARALLEL одновременно)
+        async with conversion_semaphore:
+            audio_file = await asyncio.to_thread(
+                video_converter.convert_to_audio,
+                file_path,
+                output_path=output_path,
+                progress_callback=None,  # В микросервисе не нужен callback
+                log_callback=lambda level, msg: logger.info("[%s] %s", level, msg)
+            )
         
-        return JSONResponse({
+        return ORJSONResponse({
             "status": "completed",
             "message": "Конвертация завершена успешно",
             "audio_file": str(audio_file),
@@ -119,18 +119,23 @@ async def convert_video_to_audio(
         })
         
     except Exception as e:
-        logger.error(f"❌ Ошибка при конвертации: {e}")
+        logger.error("❌ Ошибка при конвертации: %s", e)
         raise HTTPException(status_code=500, detail=f"Ошибка конвертации: {str(e)}")
+    
+    finally:
+        # Удаление временного файла
+        if file_path is not None:
+            try:
+                file_path.unlink(missing_ok=True)
+                logger.info("🗑️ Временный файл удален")
+            except Exception as e:
+                logger.warning("⚠️ Не удалось удалить временный файл: %s", e)
 
 
 @app.get("/health")
 async def health_check():
     """Проверка состояния микросервиса"""
-    return {
-        "status": "healthy",
-        "service": "video_converter",
-        "timestamp": datetime.now().isoformat()
-    }
+    return Response(content=health_body("video_converter"), media_type="application/json")
 
 
 if __name__ == "__main__":
@@ -140,12 +145,19 @@ if __name__ == "__main__":
     port = int(os.getenv("PORT", 8002))
     host = os.getenv("HOST", "0.0.0.0")
     
-    logger.info(f"🚀 Запуск микросервиса конвертации на {host}:{port}")
+    # Сервис не хранит состояние между запросами, поэтому можно запускать
+    # несколько воркеров: конвертации идут параллельно на разных ядрах
+    workers = settings.WEB_CONCURRENCY
+    
+    logger.info("🚀 Запуск микросервиса конвертации на %s:%s (воркеров: %s)", host, port, workers)
     
     uvicorn.run(
         "app.features.video_to_audio.microservice:app",
         host=host,
         port=port,
         reload=False,
+        loop=settings.UVICORN_LOOP,
+        http=settings.UVICORN_HTTP,
+        workers=workers,
         log_level=settings.LOG_LEVEL.lower()
     )
@@ -3,24 +3,29 @@
 """
 
 import os
+import asyncio
+import hashlib
 import logging
 import tempfile
-import json
 import re
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
-import uvicorn
 import httpx
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Form
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+import orjson
+from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Form, Request
+from fastapi.responses import HTMLResponse, ORJSONResponse, FileResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import aiofiles
 
+from app.core.circuit_breaker import CircuitBreaker
 from app.core.config import settings
 from app.core.logger import setup_logger, get_recent_logs
+from app.core.microservice import UPLOAD_CHUNK_SIZE
 
 # Настройка логирования
 logger = setup_logger(__name__)
@@ -35,11 +40,23 @@ def sanitize_filename(filename: str) -> str:
     sanitized = sanitized.strip('_')
     return sanitized
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Жизненный цикл приложения: инициализация и освобождение ресурсов"""
+    await startup_event()
+    try:
+        yield
+    finally:
+        await shutdown_event()
+
+
 # Создание FastAPI приложения
 app = FastAPI(
     title=settings.APP_NAME,
     description="Мощный инструмент для обработки медиа файлов с поддержкой конвертации и транскрипции",
-    version=settings.APP_VERSION
+    version=settings.APP_VERSION,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Создание директорий
@@ -59,92 +76,263 @@ MICROSERVICES_CONFIG = {
     }
 }
 
+# URL эндпоинтов микросервисов (собираются один раз)
+MICROSERVICES_HEALTH_URLS = {
+    service_name: f"{config['url']}{config['health_endpoint']}"
+    for service_name, config in MICROSERVICES_CONFIG.items()
+}
+TRANSCRIPTION_URL = f"{MICROSERVICES_CONFIG['transcription_service']['url']}/transcribe"
+TRANSCRIPTION_STATUS_URL = f"{MICROSERVICES_CONFIG['transcription_service']['url']}/status/"
+CONVERTER_URL = f"{MICROSERVICES_CONFIG['video_converter']['url']}/convert"
+
+# Доступные фичи обработки
+SUPPORTED_FEATURES = frozenset({'video-to-audio', 'transcription'})
+
+# Неизменяемая часть ответа /health (собирается один раз)
+HEALTH_STATIC_INFO = {
+    "app_name": settings.APP_NAME,
+    "app_version": settings.APP_VERSION,
+    "supported_formats": sorted(settings.ALL_SUPPORTED_FORMATS),
+    "features": ["video-to-audio", "transcription"],
+    "architecture": "microservices"
+}
+
+# Главная страница: путь к шаблону и кэш отрендеренного HTML
+# (mtime шаблона в наносекундах, готовые байты) — перечитывается только при изменении файла
+INDEX_TEMPLATE_PATH = Path(__file__).parent / "web" / "templates" / "index.html"
+_main_page_cache: Optional[Tuple[int, bytes]] = None
+
+# Интервал проверки статуса задачи для потоковой выдачи (секунд)
+STATUS_STREAM_INTERVAL = 0.5
+
 # Словарь для хранения статусов задач
 task_statuses: Dict[str, Dict[str, Any]] = {}
 
+# Общий HTTP-клиент для обращения к микросервисам (создается при запуске)
+http_client: Optional[httpx.AsyncClient] = None
+
+# Кэш статусов микросервисов для /health: (время проверки, статусы)
+MICROSERVICES_STATUS_TTL = 5.0  # секунд
+_microservices_status_cache: Optional[Tuple[float, Dict[str, str]]] = None
+_microservices_status_lock = asyncio.Lock()
+
+# Таймауты обращений к микросервисам: долго ждем только сам ответ обработки,
+# недоступный хост или занятый пул соединений обнаруживаются за секунды
+MICROSERVICES_DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+MICROSERVICES_PROCESSING_TIMEOUT = httpx.Timeout(
+    connect=5.0,
+    read=300.0,   # 5 минут на обработку файла
+    write=60.0,   # Отправка файла
+    pool=30.0     # Ожидание свободного соединения
+)
+
+# Ответы, означающие недоступность микросервиса (а не ошибку обработки конкретного файла)
+MICROSERVICE_UNAVAILABLE_CODES = frozenset({502, 503, 504})
+
+# Предохранители вызовов микросервисов: после серии сбоев запросы отклоняются сразу
+transcription_breaker = CircuitBreaker(
+    "transcription_service",
+    failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=settings.CIRCUIT_BREAKER_RESET_TIMEOUT
+)
+converter_breaker = CircuitBreaker(
+    "video_converter",
+    failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=settings.CIRCUIT_BREAKER_RESET_TIMEOUT
+)
+
 
-@app.on_event("startup")
 async def startup_event():
     """Инициализация при запуске приложения"""
+    global http_client
     
     logger.info("🚀 Запуск сервиса обработки медиа файлов...")
     
     try:
+        # Общий клиент с keep-alive соединениями к микросервисам
+        http_client = httpx.AsyncClient(
+            timeout=MICROSERVICES_DEFAULT_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.MICROSERVICES_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.MICROSERVICES_MAX_CONNECTIONS
+            )
+        )
+        
         # Проверка доступности микросервисов
         await check_microservices_health()
         
         logger.info("✅ Все сервисы успешно инициализированы")
         
     except Exception as e:
-        logger.error(f"❌ Ошибка при инициализации сервисов: {e}")
+        logger.error("❌ Ошибка при инициализации сервисов: %s", e)
         raise
 
 
+async def shutdown_event():
+    """Освобождение ресурсов при остановке приложения"""
+    
+    if http_client is not None:
+        await http_client.aclose()
+
+
 async def check_microservices_health():
     """Проверка доступности микросервисов"""
     logger.info("🔍 Проверяем доступность микросервисов...")
     
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        for service_name, config in MICROSERVICES_CONFIG.items():
-            try:
-                health_url = f"{config['url']}{config['health_endpoint']}"
-                response = await client.get(health_url)
+    for service_name, health_url in MICROSERVICES_HEALTH_URLS.items():
+        try:
+            response = await http_client.get(health_url)
+            
+            if response.status_code == 200:
+                logger.info("✅ %s доступен", service_name)
+            else:
+                logger.warning("⚠️ %s отвечает с кодом %s", service_name, response.status_code)
                 
+        except Exception as e:
+            logger.warning("⚠️ %s недоступен: %s", service_name, e)
+            # Не прерываем запуск основного приложения, если микросервисы недоступны
+            # Они могут запуститься позже
+
+
+async def get_microservices_status() -> Dict[str, str]:
+    """
+    Статусы микросервисов с кэшированием на MICROSERVICES_STATUS_TTL секунд
+    
+    Returns:
+        Словарь {имя сервиса: healthy/unhealthy/unavailable}
+    """
+    global _microservices_status_cache
+    
+    async with _microservices_status_lock:
+        if _microservices_status_cache is not None:
+            cached_at, cached_status = _microservices_status_cache
+            if time.monotonic() - cached_at < MICROSERVICES_STATUS_TTL:
+                return cached_status
+        
+        microservices_status = {}
+        
+        for service_name, health_url in MICROSERVICES_HEALTH_URLS.items():
+            try:
+                response = await http_client.get(health_url)
                 if response.status_code == 200:
-                    logger.info(f"✅ {service_name} доступен")
+                    logger.info("✅ Микросервис %s доступен", service_name)
+                    microservices_status[service_name] = "healthy"
                 else:
-                    logger.warning(f"⚠️ {service_name} отвечает с кодом {response.status_code}")
-                    
+                    logger.warning("⚠️ Микросервис %s отвечает с кодом %s", service_name, response.status_code)
+                    microservices_status[service_name] = "unhealthy"
             except Exception as e:
-                logger.warning(f"⚠️ {service_name} недоступен: {e}")
-                # Не прерываем запуск основного приложения, если микросервисы недоступны
-                # Они могут запуститься позже
+                logger.warning("⚠️ Микросервис %s недоступен: %s", service_name, e)
+                microservices_status[service_name] = "unavailable"
+        
+        _microservices_status_cache = (time.monotonic(), microservices_status)
+        return microservices_status
+
+
+def invalidate_microservices_status():
+    """Сброс кэша статусов микросервисов (например, после ошибки вызова)"""
+    global _microservices_status_cache
+    _microservices_status_cache = None
+
+
+async def ensure_circuit_closed(breaker: CircuitBreaker, service_name: str, unavailable_detail: str):
+    """
+    Проверка предохранителя перед вызовом микросервиса
+    
+    Пока цепь разомкнута, запрос отклоняется сразу. В полуоткрытом состоянии
+    один запрос проверяет /health сервиса: долгая обработка файла для пробы
+    не годится, иначе все остальные запросы получали бы 503 до ее завершения.
+    
+    Args:
+        breaker: Предохранитель микросервиса
+        service_name: Имя микросервиса в MICROSERVICES_CONFIG
+        unavailable_detail: Текст ошибки 503
+    """
+    
+    if breaker.state == "closed":
+        return
+    
+    if breaker.acquire_probe():
+        try:
+            response = await http_client.get(MICROSERVICES_HEALTH_URLS[service_name])
+            healthy = response.status_code == 200
+        except httpx.HTTPError:
+            healthy = False
+        
+        if healthy:
+            breaker.record_success()
+            return
+        
+        breaker.record_failure()
+    
+    raise HTTPException(status_code=503, detail=unavailable_detail)
 
 
 async def call_transcription_service(file_path: Path, task_id: str) -> Dict[str, Any]:
     """Вызов микросервиса транскрипции"""
     
-    transcription_url = f"{MICROSERVICES_CONFIG['transcription_service']['url']}/transcribe"
+    # Пока цепь разомкнута, не ждем таймаута заведомо недоступного сервиса
+    await ensure_circuit_closed(
+        transcription_breaker,
+        "transcription_service",
+        "Микросервис транскрипции временно недоступен после серии ошибок, повторите позже"
+    )
     
     try:
-        async with httpx.AsyncClient(timeout=300.0) as client:  # 5 минут таймаут
-            with open(file_path, 'rb') as f:
-                files = {'file': (file_path.name, f, 'application/octet-stream')}
-                data = {'task_id': task_id}
-                
-                response = await client.post(transcription_url, files=files, data=data)
-                
-                if response.status_code == 200:
-                    return response.json()
+        with open(file_path, 'rb') as f:
+            files = {'file': (file_path.name, f, 'application/octet-stream')}
+            data = {'task_id': task_id}
+            
+            response = await http_client.post(
+                TRANSCRIPTION_URL,
+                files=files,
+                data=data,
+                timeout=MICROSERVICES_PROCESSING_TIMEOUT
+            )
+            
+            if response.status_code == 200:
+                transcription_breaker.record_success()
+                return orjson.loads(response.content)
+            else:
+                # Сбоем считается только недоступность сервиса: 500 из-за битого
+                # файла пользователя означает, что сервис жив и отвечает
+                if response.status_code in MICROSERVICE_UNAVAILABLE_CODES:
+                    transcription_breaker.record_failure()
                 else:
-                    raise HTTPException(
-                        status_code=response.status_code,
-                        detail=f"Ошибка микросервиса транскрипции: {response.text}"
-                    )
-                    
+                    transcription_breaker.record_success()
+                raise HTTPException(
+                    status_code=response.status_code,
+                    detail=f"Ошибка микросервиса транскрипции: {response.text}"
+                )
+                
     except httpx.TimeoutException:
+        transcription_breaker.record_failure()
+        invalidate_microservices_status()
         raise HTTPException(status_code=408, detail="Таймаут микросервиса транскрипции")
+    except httpx.TransportError as e:
+        transcription_breaker.record_failure()
+        invalidate_microservices_status()
+        raise HTTPException(status_code=500, detail=f"Ошибка вызова микросервиса транскрипции: {str(e)}")
     except Exception as e:
+        invalidate_microservices_status()
         raise HTTPException(status_code=500, detail=f"Ошибка вызова микросервиса транскрипции: {str(e)}")
 
 
 async def get_transcription_status(task_id: str) -> Dict[str, Any]:
     """Получение статуса транскрипции от микросервиса"""
     
-    status_url = f"{MICROSERVICES_CONFIG['transcription_service']['url']}/status/{task_id}"
+    status_url = f"{TRANSCRIPTION_STATUS_URL}{task_id}"
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(status_url)
+        response = await http_client.get(status_url)
+        
+        if response.status_code == 200:
+            return orjson.loads(response.content)
+        else:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Ошибка получения статуса: {response.text}"
+            )
             
-            if response.status_code == 200:
-                return response.json()
-            else:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Ошибка получения статуса: {response.text}"
-                )
-                
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка получения статуса: {str(e)}")
 
@@ -152,48 +340,76 @@ async def get_transcription_status(task_id: str) -> Dict[str, Any]:
 async def call_video_converter_service(file_path: Path, task_id: str) -> Dict[str, Any]:
     """Вызов микросервиса конвертации видео в аудио"""
     
-    converter_url = f"{MICROSERVICES_CONFIG['video_converter']['url']}/convert"
+    # Пока цепь разомкнута, не ждем таймаута заведомо недоступного сервиса
+    await ensure_circuit_closed(
+        converter_breaker,
+        "video_converter",
+        "Микросервис конвертации временно недоступен после серии ошибок, повторите позже"
+    )
     
     try:
-        async with httpx.AsyncClient(timeout=300.0) as client:  # 5 минут таймаут
-            with open(file_path, 'rb') as f:
-                files = {'file': (file_path.name, f, 'application/octet-stream')}
-                data = {'task_id': task_id}
-                
-                response = await client.post(converter_url, files=files, data=data)
-                
-                if response.status_code == 200:
-                    return response.json()
+        with open(file_path, 'rb') as f:
+            files = {'file': (file_path.name, f, 'application/octet-stream')}
+            data = {'task_id': task_id}
+            
+            response = await http_client.post(
+                CONVERTER_URL,
+                files=files,
+                data=data,
+                timeout=MICROSERVICES_PROCESSING_TIMEOUT
+            )
+            
+            if response.status_code == 200:
+                converter_breaker.record_success()
+                return orjson.loads(response.content)
+            else:
+                # Сбоем считается только недоступность сервиса: 500 из-за битого
+                # файла пользователя означает, что сервис жив и отвечает
+                if response.status_code in MICROSERVICE_UNAVAILABLE_CODES:
+                    converter_breaker.record_failure()
                 else:
-                    raise HTTPException(
-                        status_code=response.status_code,
-                        detail=f"Ошибка микросервиса конвертации: {response.text}"
-                    )
-                    
+                    converter_breaker.record_success()
+                raise HTTPException(
+                    status_code=response.status_code,
+                    detail=f"Ошибка микросервиса конвертации: {response.text}"
+                )
+                
     except httpx.TimeoutException:
+        converter_breaker.record_failure()
+        invalidate_microservices_status()
         raise HTTPException(status_code=408, detail="Таймаут микросервиса конвертации")
+    except httpx.TransportError as e:
+        converter_breaker.record_failure()
+        invalidate_microservices_status()
+        raise HTTPException(status_code=500, detail=f"Ошибка вызова микросервиса конвертации: {str(e)}")
     except Exception as e:
+        invalidate_microservices_status()
         raise HTTPException(status_code=500, detail=f"Ошибка вызова микросервиса конвертации: {str(e)}")
 
 
 @app.get("/", response_class=HTMLResponse)
 async def get_main_page():
     """Главная страница с выбором фич"""
-    
-    # Читаем HTML шаблон
-    template_path = Path(__file__).parent / "web" / "templates" / "index.html"
+    global _main_page_cache
     
     try:
-        async with aiofiles.open(template_path, 'r', encoding='utf-8') as f:
+        mtime_ns = os.stat(INDEX_TEMPLATE_PATH).st_mtime_ns
+        
+        if _main_page_cache is not None and _main_page_cache[0] == mtime_ns:
+            return HTMLResponse(content=_main_page_cache[1])
+        
+        # Читаем HTML шаблон
+        async with aiofiles.open(INDEX_TEMPLATE_PATH, 'r', encoding='utf-8') as f:
             html_content = await f.read()
         
-        # Заменяем переменные в шаблоне
+        # Заменяем переменные в шаблоне и кэшируем готовые байты
         html_content = html_content.replace("{{ app_name }}", settings.APP_NAME)
+        _main_page_cache = (mtime_ns, html_content.encode('utf-8'))
         
-        return HTMLResponse(content=html_content)
+        return HTMLResponse(content=_main_page_cache[1])
         
     except Exception as e:
-        logger.error(f"❌ Ошибка загрузки шаблона: {e}")
+        logger.error("❌ Ошибка загрузки шаблона: %s", e)
         return HTMLResponse(content="<h1>Ошибка загрузки интерфейса</h1>")
 
 
@@ -214,7 +430,7 @@ async def process_file(
         JSON с task_id для отслеживания прогресса
     """
     
-    logger.info(f"📤 Получен файл для обработки: {file.filename} (фича: {feature})")
+    logger.info("📤 Получен файл для обработки: %s (фича: %s)", file.filename, feature)
     
     # Санитизация имени файла
     original_filename = file.filename
@@ -223,14 +439,14 @@ async def process_file(
     # Проверка формата файла
     file_extension = Path(original_filename).suffix.lower()
     if file_extension not in settings.ALL_SUPPORTED_FORMATS:
-        logger.error(f"❌ Неподдерживаемый формат файла: {file_extension}")
+        logger.error("❌ Неподдерживаемый формат файла: %s", file_extension)
         raise HTTPException(
             status_code=400,
             detail=f"Неподдерживаемый формат файла. Поддерживаемые форматы: {', '.join(settings.ALL_SUPPORTED_FORMATS)}"
         )
     
     # Проверка выбранной фичи
-    if feature not in ['video-to-audio', 'transcription']:
+    if feature not in SUPPORTED_FEATURES:
         raise HTTPException(
             status_code=400,
             detail="Неверная фича. Доступные фичи: 'video-to-audio', 'transcription'"
@@ -238,17 +454,18 @@ async def process_file(
     
     # Создание уникального ID задачи
     task_id = f"task_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{safe_filename}"
-    logger.info(f"🆔 Создана задача с ID: {task_id}")
+    logger.info("🆔 Создана задача с ID: %s", task_id)
     
     try:
         # Сохранение загруженного файла с безопасным именем
         file_path = settings.UPLOAD_DIR / safe_filename
         
+        # Пишем файл частями, не загружая его целиком в память
         async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await f.write(chunk)
         
-        logger.info(f"💾 Файл сохранен: {file_path}")
+        logger.info("💾 Файл сохранен: %s", file_path)
         
         # Добавление задачи в фоновую обработку
         if feature == 'transcription':
@@ -266,7 +483,7 @@ async def process_file(
                 file_extension
             )
         
-        return JSONResponse({
+        return ORJSONResponse({
             "task_id": task_id,
             "message": "Файл загружен, начинается обработка",
             "filename": original_filename,
@@ -275,7 +492,7 @@ async def process_file(
         })
         
     except Exception as e:
-        logger.error(f"❌ Ошибка при загрузке файла: {e}")
+        logger.error("❌ Ошибка при загрузке файла: %s", e)
         raise HTTPException(status_code=500, detail=f"Ошибка при загрузке файла: {str(e)}")
 
 
@@ -300,7 +517,7 @@ async def process_transcription_task(task_id: str, file_path: Path, file_extensi
             "message": message
         }
         task_statuses[task_id]["logs"].append(log_entry)
-        logger.info(f"[{task_id}] {level}: {message}")
+        logger.info("[%s] %s: %s", task_id, level, message)
     
     try:
         add_log("INFO", f"🚀 Отправляем файл в микросервис транскрипции: {file_path.name}")
@@ -378,7 +595,7 @@ async def process_video_to_audio_task(task_id: str, file_path: Path, file_extens
             "message": message
         }
         task_statuses[task_id]["logs"].append(log_entry)
-        logger.info(f"[{task_id}] {level}: {message}")
+        logger.info("[%s] %s: %s", task_id, level, message)
     
     try:
         add_log("INFO", f"🚀 Отправляем файл в микросервис конвертации: {file_path.name}")
@@ -425,12 +642,16 @@ async def process_video_to_audio_task(task_id: str, file_path: Path, file_extens
 
 
 @app.get("/status/{task_id}")
-async def get_task_status(task_id: str):
+async def get_task_status(task_id: str, request: Request):
     """
     Получение статуса задачи
     
+    Поддерживает ETag: если статус не изменился с прошлого опроса
+    (заголовок If-None-Match), возвращается пустой ответ 304.
+    
     Args:
         task_id: ID задачи
+        request: Входящий запрос
         
     Returns:
         JSON со статусом задачи
@@ -439,7 +660,52 @@ async def get_task_status(task_id: str):
     if task_id not in task_statuses:
         raise HTTPException(status_code=404, detail="Задача не найдена")
     
-    return JSONResponse(task_statuses[task_id])
+    payload = orjson.dumps(task_statuses[task_id])
+    etag = f'"{hashlib.blake2b(payload, digest_size=8).hexdigest()}"'
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    return Response(content=payload, media_type="application/json", headers={"ETag": etag})
+
+
+@app.get("/status/{task_id}/stream")
+async def stream_task_status(task_id: str):
+    """
+    Потоковая выдача статуса задачи в формате NDJSON
+    
+    Вместо периодического опроса /status клиент получает по строке JSON
+    при каждом изменении статуса, пока задача не завершится.
+    
+    Args:
+        task_id: ID задачи
+        
+    Returns:
+        Поток NDJSON со статусами задачи
+    """
+    
+    if task_id not in task_statuses:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    
+    async def status_updates():
+        last_payload = None
+        
+        while True:
+            task_status = task_statuses.get(task_id)
+            if task_status is None:
+                break
+            
+            payload = orjson.dumps(task_status)
+            if payload != last_payload:
+                yield payload + b"\n"
+                last_payload = payload
+            
+            if task_status["status"] in ("completed", "failed"):
+                break
+            
+            await asyncio.sleep(STATUS_STREAM_INTERVAL)
+    
+    return StreamingResponse(status_updates(), media_type="application/x-ndjson")
 
 
 @app.get("/download/{task_id}/{file_type}")
@@ -489,35 +755,16 @@ async def download_result(task_id: str, file_type: str):
 async def health_check():
     """Проверка состояния сервиса"""
     
-    # Проверяем доступность микросервисов
-    microservices_status = {}
-    
-    for service_name, config in MICROSERVICES_CONFIG.items():
-        try:
-            health_url = f"{config['url']}{config['health_endpoint']}"
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(health_url)
-                if response.status_code == 200:
-                    logger.info(f"✅ Микросервис {service_name} доступен")
-                    microservices_status[service_name] = "healthy"
-                else:
-                    logger.warning(f"⚠️ Микросервис {service_name} отвечает с кодом {response.status_code}")
-                    microservices_status[service_name] = "unhealthy"
-        except Exception as e:
-            logger.warning(f"⚠️ Микросервис {service_name} недоступен: {e}")
-            microservices_status[service_name] = "unavailable"
+    # Проверяем доступность микросервисов (результат кэшируется на короткое время)
+    microservices_status = await get_microservices_status()
 
     # Определяем общий статус
     all_healthy = all(status == "healthy" for status in microservices_status.values())
     overall_status = "healthy" if all_healthy else "degraded"
 
-    return JSONResponse({
+    return ORJSONResponse({
         "status": overall_status,
-        "app_name": settings.APP_NAME,
-        "app_version": settings.APP_VERSION,
-        "supported_formats": list(settings.ALL_SUPPORTED_FORMATS),
-        "features": ["video-to-audio", "transcription"],
-        "architecture": "microservices",
+        **HEALTH_STATIC_INFO,
         "microservices": microservices_status
     })
 
@@ -527,10 +774,12 @@ async def get_logs(limit: int = 100):
     """Получение последних логов"""
     
     logs = get_recent_logs(limit)
-    return JSONResponse({"logs": logs})
+    return ORJSONResponse({"logs": logs})
 
 
 if __name__ == "__main__":
+    import uvicorn
+    
     logger.info("🎬 Запуск сервиса обработки медиа файлов...")
     
     # Получаем настройки из переменных окружения
@@ -547,5 +796,7 @@ if __name__ == "__main__":
         host=host,
         port=port,
         reload=False,  # Отключаем reload в Docker
+        loop=settings.UVICORN_LOOP,
+        http=settings.UVICORN_HTTP,
         log_level=log_level
     )
@@ -31,13 +31,15 @@ if __name__ == "__main__":
     if settings.DOCKER_ENV:
         host = "0.0.0.0"
     
-    logger.info(f"🌐 Сервер запускается на {host}:{port}")
-    logger.info(f"📊 Уровень логирования: {log_level}")
+    logger.info("🌐 Сервер запускается на %s:%s", host, port)
+    logger.info("📊 Уровень логирования: %s", log_level)
     
     uvicorn.run(
         "app.main:app",
         host=host,
         port=port,
         reload=False,  # Отключаем reload в Docker
+        loop=settings.UVICORN_LOOP,
+        http=settings.UVICORN_HTTP,
         log_level=log_level
     )